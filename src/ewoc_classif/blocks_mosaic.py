@@ -21,9 +21,9 @@ from worldcereal.worldcereal_products import run_tile
 
 from ewoc_classif.ewoc_model import EWOC_CL_MODEL_VERSION, EWOC_CT_MODEL_VERSION, EWOC_IRR_MODEL_VERSION
 from ewoc_classif.utils import (
-    is_empty_dirs,
     generate_config_file,
-    ingest_into_vdm,
+    ingest_stacs_into_vdm,
+    is_empty_dirs,
     remove_tmp_files,
     update_config,
     update_metajsons,
@@ -303,10 +303,9 @@ def generate_ewoc_products(
     # Notify VDM
     if upload_prd and notify_vdm:
         logger.debug("Try to notify the VDM of new products to ingest")
-        for stac_filepath in stac_paths:
-            if not ingest_into_vdm(stac_filepath):
-                logger.error(f'VDM notification failed for {tile_id_msg}')
-                # No error send to Alex
+        for stac_path in ingest_stacs_into_vdm(stac_paths):
+            logger.error(f'VDM notification failed for {tile_id_msg}: {stac_path}')
+            # No error send to Alex
     else:
         logger.info('Notification to VDM skip as requested!')
 
@@ -32,7 +32,7 @@ from ewoc_classif.ewoc_model import (EWOC_CL_MODEL_VERSION,
 from ewoc_classif.utils import (
     check_outfold,
     generate_config_file,
-    ingest_into_vdm,
+    ingest_stacs_into_vdm,
     remove_tmp_files,
     update_config,
     update_metajsons,
@@ -406,9 +406,9 @@ def postprocess_mosaic(
         # Starting ingestion of products in the VDM
         if stac_paths:
             logger.info("Notifying the VDM of new products to ingest")
-            for stac in stac_paths:
-                if not ingest_into_vdm(stac):
-                    logger.error(f'VDM ingestion error for tile: "{tile_id}" ({year}, {season})')
+            for stac_path in ingest_stacs_into_vdm(stac_paths):
+                logger.error(f'VDM ingestion error for tile: "{tile_id}" ({year}, {season}): '
+                             f'{stac_path}')
         else:
             logger.warning('No STAC files were found to start ingestion')
     else:
@@ -155,7 +155,7 @@ def down_models(cp_url: str,model_dirpath: Path)-> None:
         elif "CatBoost" in link:
             download_file(link, outdir)
         else:
-            _logger.warning(f' {link} is not downloaded')
+            _logger.warning(' %s is not downloaded', link)
 
 
 def update_config(config_path: Path, root_dir: Path) -> None:
@@ -178,7 +178,7 @@ def update_config(config_path: Path, root_dir: Path) -> None:
     with open(config_path, "w", encoding="UTF-8") as out:
         json.dump(data, out)
 
-    _logger.debug(f"Updated: {config_path}")
+    _logger.debug("Updated: %s", config_path)
 
 def main(args):
     """
@@ -3,19 +3,44 @@
 Helpful functions for the classification process
 """
 import argparse
+import fnmatch
 import json
 import logging
 import os
+import re
 import shutil
 import sys
-from datetime import datetime
-from distutils.util import strtobool
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
 from loguru import logger
 
-import requests
+if TYPE_CHECKING:
+    # requests is imported on first use: most commands never talk to the VDM
+    import requests
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter calling strftime once per second instead of once per record
+
+    Only valid for a datefmt without sub-second fields.
+    """
+
+    _cached_time = (-1, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        second = int(record.created)
+        cached_second, cached_str = self._cached_time
+        if second != cached_second:
+            cached_str = super().formatTime(record, datefmt)
+            self._cached_time = (second, cached_str)
+        return cached_str
+
 
 def setup_logging(loglevel: int) -> None:
     """Setup basic logging
@@ -24,12 +49,12 @@ def setup_logging(loglevel: int) -> None:
       loglevel (int): minimum loglevel for emitting messages
     """
     logformat = "[%(asctime)s] %(levelname)s:%(name)s:%(message)s"
-    logging.basicConfig(
-        level=loglevel,
-        stream=sys.stdout,
-        format=logformat,
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    # Records are written by the logging thread itself: a background writer could
+    # land in the middle of the lines printed to stdout for the orchestration
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        _CachedTimeFormatter(logformat, datefmt="%Y-%m-%d %H:%M:%S"))
+    logging.basicConfig(level=loglevel, handlers=[stream_handler])
 
 def valid_year(cli_str: str) -> int:
     """Check if the intput string is a valid year
@@ -43,11 +68,66 @@ def valid_year(cli_str: str) -> int:
     Returns:
         int: a valid year as int
     """
-    try:
-        return datetime.strptime(cli_str, "%Y").year
-    except ValueError:
-        raise argparse.ArgumentTypeError(f"Not a valid year: {cli_str}!") from None
+    if len(cli_str) == 4 and cli_str.isascii() and cli_str.isdigit():
+        year = int(cli_str)
+        if year >= 1:
+            return year
+    raise argparse.ArgumentTypeError(f"Not a valid year: {cli_str}!")
+
+
+def _name_matcher(pattern: str) -> Callable[[str], bool]:
+    """Build a case sensitive matcher for the file names ending with pattern
 
+    Args:
+        pattern (str): Suffix to match, may contain glob wildcards
+
+    Returns:
+        Callable[[str], bool]: Function returning True if a name matches
+    """
+    if any(char in pattern for char in "*?["):
+        regex = re.compile(fnmatch.translate(f"*{pattern}"))
+        return lambda name: regex.match(name) is not None
+    return lambda name: name.endswith(pattern)
+
+def _scan_tree(folder: Path, match: Callable[[os.DirEntry], bool]) -> Iterator[os.DirEntry]:
+    """Walk a folder with os.scandir and yield the matching entries
+
+    The matching directories are yielded but not walked into. As with os.walk, the
+    folders which cannot be opened (vanished, permission denied) are skipped.
+
+    Args:
+        folder (Path): Root folder of the walk
+        match (Callable[[os.DirEntry], bool]): Selects the entries to yield
+
+    Yields:
+        os.DirEntry: Matching entries
+    """
+    dirpaths = [os.fspath(folder)]
+    while dirpaths:
+        try:
+            entries = os.scandir(dirpaths.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if match(entry):
+                    yield entry
+                elif entry.is_dir(follow_symlinks=False):
+                    dirpaths.append(entry.path)
+
+def _remove_entry(entry: os.DirEntry) -> bool:
+    """Remove a file or a whole directory, return True if it was a directory"""
+    if entry.is_dir(follow_symlinks=False):
+        shutil.rmtree(entry.path)
+        return True
+    os.unlink(entry.path)
+    return False
+
+def _count_removal(removal: "Future[bool]", counts: Counter) -> None:
+    try:
+        counts["dirs" if removal.result() else "files"] += 1
+    except Exception:
+        counts["failed"] += 1
 
 def remove_tmp_files(folder: Path, suffix: str) -> None:
     """
@@ -56,17 +136,86 @@ def remove_tmp_files(folder: Path, suffix: str) -> None:
     :param suffix: Pattern for the search ex 31TCJ.tif
     :return: None
     """
+    match = _name_matcher(suffix)
+    counts: Counter = Counter()
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    # Bound the deletions in flight so that a huge tree does not pile up futures
+    max_pending = 4 * max_workers
+    pending: Deque["Future[bool]"] = deque()
     try:
-        elem_to_del = list(folder.rglob(f"*{suffix}"))
-        for elem in elem_to_del:
-            if elem.is_dir():
-                shutil.rmtree(elem)
-                logger.info(f"Deleted tmp file: {elem}")
-            elif elem.is_file():
-                elem.unlink()
-                logger.info(f"Deleted tmp file: {elem}")
+        # Deletions are blocking syscalls, overlap them while the walk goes on.
+        # Matching dirs are not walked into, so removing them during the walk is safe
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for elem in _scan_tree(folder, lambda entry: match(entry.name)):
+                pending.append(executor.submit(_remove_entry, elem))
+                if len(pending) > max_pending:
+                    _count_removal(pending.popleft(), counts)
     except Exception:
         logger.warning("Could not delete all tmp files")
+    while pending:
+        _count_removal(pending.popleft(), counts)
+    if counts["failed"]:
+        logger.warning(f"Could not delete {counts['failed']} tmp files")
+    logger.info(
+        f"Deleted {counts['files']} tmp files and {counts['dirs']} tmp dirs matching *{suffix}")
+
+
+# Parameters shared by every generated config, copied into each new config
+_BASE_PARAMETERS = MappingProxyType({
+    "save_confidence": True,
+    "save_features": True,
+    "segment": False,
+    "save_meta": True,
+    "localmodels": False,
+    "decision_threshold": 0.5,
+})
+
+# Croptype models used for each season
+_CROPTYPE_MODELS = {
+    "summer1": ("maize", "springcereals"),
+    "summer2": ("maize",),
+    "winter": ("wintercereals",),
+}
+# Croptype models added to a season when an additional croptype is requested
+_ADDITIONAL_CROPTYPE_MODELS = {
+    "summer1": ("sunflower",),
+    "winter": ("rapeseed",),
+}
+
+@lru_cache(maxsize=None)
+def _model_url(
+    model_prefix: str,
+    model_version: str,
+    model_name: str,
+    url_suffix: str = "/config.json"
+) -> str:
+    """Build the url (or local path) of a worldcereal model
+
+    Args:
+        model_prefix (str): Artifactory url or local models root dir
+        model_version (str): Model version, ex v750
+        model_name (str): Detector name, ex maize
+        url_suffix (str): Suffix added after the detector dir
+
+    Returns:
+        str: Model url
+    """
+    return (f"{model_prefix}/models/WorldCerealPixelCatBoost/{model_version}/"
+            f"{model_name}_detector_WorldCerealPixelCatBoost_{model_version}{url_suffix}")
+
+# Values accepted by the former distutils.util.strtobool
+_BOOLS = {
+    "y": True, "yes": True, "t": True, "true": True, "on": True, "1": True,
+    "n": False, "no": False, "f": False, "false": False, "off": False, "0": False,
+}
+
+
+def _str_to_bool(value: str) -> bool:
+    try:
+        return _BOOLS[value.lower()]
+    except KeyError:
+        raise ValueError(f"invalid truth value {value!r}") from None
+
 
 def generate_config_file(
     featuresettings: str,
@@ -119,14 +268,9 @@ def generate_config_file(
         "year": end_season_year,
         "season": ewoc_season,
         "featuresettings": featuresettings,
-        "save_confidence": True,
-        "save_features": True,
-        "segment": False,
         'features_dir': str(feature_blocks_dir),
         'use_existing_features': use_existing_features,
-        'save_meta' : True,
-        'localmodels': False,
-        'decision_threshold' : 0.5
+        **_BASE_PARAMETERS,
     }
 
     # Support the switch between local models and use of artifactory
@@ -139,13 +283,14 @@ def generate_config_file(
         parameters["filtersettings"]= {"kernelsize": 3, "conf_threshold": 0.85}
 
         models = {
-            "annualcropland": f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{cropland_model_version}/cropland_detector_WorldCerealPixelCatBoost_{cropland_model_version}-realms"
+            "annualcropland": _model_url(
+                ewoc_model_prefix, cropland_model_version, "cropland", "-realms")
         }
 
         logger.info(f"[{featuresettings}] - Using model version: {cropland_model_version}")
         config = {"parameters": parameters, "inputs": csv_dict, "models": models}
     elif featuresettings == "croptype":
-        is_dev = strtobool(os.getenv("EWOC_DEV_MODE", "False"))
+        is_dev = _str_to_bool(os.getenv("EWOC_DEV_MODE", "False"))
         if is_dev:
             cropland_mask_bucket = f"s3://ewoc-prd-dev/{production_id}"
         else:
@@ -162,7 +307,8 @@ def generate_config_file(
                     "irrigation": True,
                     "irrparameters": "irrigation",
                     "irrmodels": {
-                        "irrigation": f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{irr_model_version}/irrigation_detector_WorldCerealPixelCatBoost_{irr_model_version}/config.json"
+                        "irrigation": _model_url(
+                            ewoc_model_prefix, irr_model_version, "irrigation")
                     },
                 }
             )
@@ -175,30 +321,18 @@ def generate_config_file(
                     "irrigation" : False
                 }
             )
-        if ewoc_season == "summer1":
-            models = {
-                "maize": f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{croptype_model_version}/maize_detector_WorldCerealPixelCatBoost_{croptype_model_version}/config.json",
-                "springcereals": f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{croptype_model_version}/springcereals_detector_WorldCerealPixelCatBoost_{croptype_model_version}/config.json",
-            }
-            if add_croptype:
-                models["sunflower"] = f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{croptype_model_version}/sunflower_detector_WorldCerealPixelCatBoost_{croptype_model_version}/config.json"
-            config = {"parameters": parameters, "inputs": csv_dict, "models": models}
-            logger.info(f"[{ewoc_season}] - Using model version: {croptype_model_version}")
-        elif ewoc_season == "summer2":
-            models = {
-                "maize": f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{croptype_model_version}/maize_detector_WorldCerealPixelCatBoost_{croptype_model_version}/config.json"
-            }
-            config = {"parameters": parameters, "inputs": csv_dict, "models": models}
-            logger.info(f"[{ewoc_season}] - Using model version: {croptype_model_version}")
-        elif ewoc_season == "winter":
-            models = {
-                "wintercereals": f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{croptype_model_version}/wintercereals_detector_WorldCerealPixelCatBoost_{croptype_model_version}/config.json"
-            }
-            if add_croptype:
-                models["rapeseed"] = f"{ewoc_model_prefix}/models/WorldCerealPixelCatBoost/{croptype_model_version}/rapeseed_detector_WorldCerealPixelCatBoost_{croptype_model_version}/config.json"
-
-            config = {"parameters": parameters, "inputs": csv_dict, "models": models}
-            logger.info(f"[{ewoc_season}] - Using model version: {croptype_model_version}")
+        if ewoc_season not in _CROPTYPE_MODELS:
+            logger.error(f'{ewoc_season} not accepted as croptype season!')
+            return {}
+        model_names = _CROPTYPE_MODELS[ewoc_season]
+        if add_croptype:
+            model_names += _ADDITIONAL_CROPTYPE_MODELS.get(ewoc_season, ())
+        models = {
+            model_name: _model_url(ewoc_model_prefix, croptype_model_version, model_name)
+            for model_name in model_names
+        }
+        config = {"parameters": parameters, "inputs": csv_dict, "models": models}
+        logger.info(f"[{ewoc_season}] - Using model version: {croptype_model_version}")
     else:
         logger.error(f'{featuresettings} not accepted as value!')
         config={}
@@ -211,15 +345,13 @@ def check_outfold(outdir: Path) -> bool:
     :param outdir: Folder to check
     :return: bool
     """
-    check = False
-    if outdir.exists():
-        for __unused, __unused_list, files in os.walk(outdir):
-            if len(files) > 0:
-                check = True
-                break
-    else:
+    if not os.path.isdir(outdir):
         logger.info(f"Non existing folder: {outdir}")
-    return check
+        return False
+    # Stop at the first file found instead of listing the whole tree,
+    # the unreadable folders are skipped as os.walk does
+    first_file = next(_scan_tree(outdir, lambda entry: not entry.is_dir()), None)
+    return first_file is not None
 
 def is_empty_dirs(dir_path: Path)->bool:
     """ Check if a directory and its sub-directories are empty
@@ -241,6 +373,56 @@ def is_empty_dirs(dir_path: Path)->bool:
     raise FileNotFoundError
 
 
+# Same files as the **/*metadata_*.json glob
+_METAJSON_NAME = re.compile(r"metadata_.*\.json\Z", re.DOTALL)
+
+
+def _is_metajson(entry: os.DirEntry) -> bool:
+    return entry.is_file() and _METAJSON_NAME.search(entry.name) is not None
+
+
+def _update_metajson(meta: Path, root_path: str, out_dir_folder: Path, user_id: str) -> None:
+    """
+    Update one stac json file in place
+    :param meta: Path to the stac json file
+    :type meta: Path
+    :param root_path: Root path in s3 bucket, will be used to replace local folders
+    :type root_path: str
+    :param out_dir_folder: Local folder to replace in the links
+    :type out_dir_folder: Path
+    :param user_id: User id to set in place of the default one
+    :type user_id: str
+    :return: None
+    """
+    local_path = str(out_dir_folder)
+    # Scanned paths are already under out_dir_folder, do not re-join them
+    data = json.loads(meta.read_text(encoding="UTF-8"))
+    # Update links
+    for link in data["links"]:
+        if link["rel"] == "self":
+            link["href"] = link["href"].replace(local_path, root_path)
+    # Update assets
+    for prd in data["assets"].values():
+        prd["href"] = prd["href"].replace(local_path, root_path)
+    # Update visibility
+    if data["properties"]["public"] == "false":
+        data["properties"]["public"] = "true"
+        logger.info("Updated public for {} with to true", meta)
+    # Update users
+    if data["properties"]["users"] == ["0000"]:
+        data["properties"]["users"] = [user_id]
+        logger.info("Updated user id for {} with {}", meta, user_id)
+    # Update user id
+    coll_id_head, __unused, coll_id_user = data["properties"][
+        "tile_collection_id"].rpartition("_")
+    if coll_id_user == "0000":
+        tmp_coll_id = f"{coll_id_head}_{user_id}"
+        data["properties"]["tile_collection_id"] = tmp_coll_id
+        logger.info("Updated tile collection id to {}", tmp_coll_id)
+    meta.write_text(json.dumps(data), encoding="UTF-8")
+    logger.info("Updated {} with {}", meta, root_path)
+
+
 def update_metajsons(root_path: str, out_dir_folder: Path) -> list:
     """
     Update all stac json files in a folder
@@ -259,40 +441,15 @@ def update_metajsons(root_path: str, out_dir_folder: Path) -> list:
         user_id = user_id_tmp2[0]
     else:
         user_id = "_".join(user_id_tmp2)
-    # Find all json metadata files
-    metajsons = list(out_dir_folder.rglob("*metadata_*.json"))
+    # Find all json metadata files, a missing or unreadable folder gives none
+    metajsons = [Path(entry.path) for entry in _scan_tree(out_dir_folder, _is_metajson)]
     if metajsons:
-        for meta in metajsons:
-            with open(out_dir_folder / meta, "r", encoding='UTF-8') as stac_file:
-                data = json.load(stac_file)
-            # Update links
-            for link in data["links"]:
-                if link["rel"] == "self":
-                    link["href"] = link["href"].replace(str(out_dir_folder), root_path)
-            # Update assets
-            for asset in data["assets"]:
-                prd = data["assets"][asset]
-                prd["href"] = prd["href"].replace(str(out_dir_folder), root_path)
-            # Update visibility
-            if data["properties"]["public"] == "false":
-                data["properties"]["public"] = "true"
-                logger.info(f"Updated public for {meta} with to true")
-            # Update users
-            if data["properties"]["users"] == ["0000"]:
-                data["properties"]["users"] = [user_id]
-                logger.info(f"Updated user id for {meta} with {user_id}")
-            # Update user id
-            if data["properties"]["tile_collection_id"].split("_")[-1] == "0000":
-                tmp_coll_id = (
-                    "_".join(data["properties"]["tile_collection_id"].split("_")[:-1])
-                    + "_"
-                    + user_id
-                )
-                data["properties"]["tile_collection_id"] = tmp_coll_id
-                logger.info(f"Updated tile collection id to {tmp_coll_id}")
-            with open(out_dir_folder / meta, "w", encoding="UTF-8") as out:
-                json.dump(data, out)
-            logger.info(f"Updated {meta} with {root_path}")
+        # Files are independent and the work is I/O bound: update them concurrently
+        update_meta = partial(_update_metajson, root_path=root_path,
+                              out_dir_folder=out_dir_folder, user_id=user_id)
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # Consume the results to raise the first error, if any
+            list(executor.map(update_meta, metajsons))
     else:
         logger.warning("No json file found using **metadata_*.json wildcard")
 
@@ -327,40 +484,109 @@ def update_config(config_dict: Dict, ewoc_detector: str, data_folder: Path) -> D
         )
     return config_dict
 
-def ingest_into_vdm(stac_path) -> bool:
-    if not os.path.isfile(stac_path):
-        logger.error(f'JSON STAC file not found: "{stac_path}"')
-        return False
+# requests.Session is not thread safe: each ingestion thread gets its own session
+_VDM_LOCAL = threading.local()
+
+
+def _vdm_session() -> "requests.Session":
+    """Session of the current thread, reusing its connections to the VDM between ingestions"""
+    session = getattr(_VDM_LOCAL, "session", None)
+    if session is not None:
+        return session
+    import requests  # pylint: disable=import-outside-toplevel
+    from requests.adapters import HTTPAdapter  # pylint: disable=import-outside-toplevel
+    from urllib3.util.retry import Retry  # pylint: disable=import-outside-toplevel
 
+    session = requests.Session()
+    # Only retry failed connections: the POST may not be idempotent
+    adapter = HTTPAdapter(
+        max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    _VDM_LOCAL.session = session
+    return session
+
+
+def _vdm_target() -> Optional[Tuple[str, Dict[str, str]]]:
+    """Read the VDM endpoint and the request headers from the environment"""
     vdm_host = os.environ.get('VDM_HOST')
     if not vdm_host:
         logger.error('VDM host required ; environment variable "VDM_HOST" not set')
-        return False
+        return None
     vdm_endpoint = f'http://{vdm_host}/rest/project/worldCereal/product'
 
     vdm_auth = os.environ.get('VDM_USERINFO')
     if not vdm_auth:
         logger.error('VDM user info missing ; environment variable "VDM_USERINFO" not set')
+        return None
+    return vdm_endpoint, {'x-userinfo': vdm_auth, 'Content-Type': 'application/json'}
+
+
+def _post_stac(stac_path, vdm_endpoint: str, headers: Dict[str, str]) -> bool:
+    import requests  # pylint: disable=import-outside-toplevel
+
+    resp = None
+    try:
+        # Send the file as is, it is already serialized JSON
+        payload = Path(stac_path).read_bytes()
+        # 5 sec connection timeout, 10 sec timeout to receive data
+        resp = _vdm_session().post(
+            vdm_endpoint, headers=headers, data=payload, timeout=(5, 15))
+        resp.raise_for_status()
+        logger.info(f'VDM-Ingestion Response code: {resp.status_code}')
+        return resp.status_code == 200
+    except requests.ConnectTimeout:
+        logger.error(f'VDM Connection timeout for endpoint {vdm_endpoint}')
+        return False
+    except requests.ReadTimeout:
+        logger.error(f'VDM Read timeout (no data received) from endpoint {vdm_endpoint}')
+        return False
+    except requests.RequestException as x:
+        status_code = resp.status_code if resp is not None else None
+        logger.error(f'VDM ingestion failed (status code: {status_code}): {x}')
+        return False
+    except OSError as x:
+        logger.error(f'JSON STAC file not readable: "{stac_path}": {x}')
         return False
-    headers = {'x-userinfo': vdm_auth}
 
-    with open(stac_path, 'r', encoding='UTF-8') as fh:
-        try:
-            payload = json.load(fh)
-            # 5 sec connection timeout, 10 sec timeout to receive data
-            resp = requests.post(vdm_endpoint, headers=headers, json=payload, timeout=(5, 15))
-            resp.raise_for_status()
-            print('VDM-Ingestion Response code:', resp.status_code)
-            return resp.status_code == 200
-        except requests.ConnectTimeout:
-            logger.error(f'VDM Connection timeout for endpoint {vdm_endpoint}')
-            return False
-        except requests.ReadTimeout:
-            logger.error(f'VDM Read timeout (no data received) from endpoint {vdm_endpoint}')
-            return False
-        except Exception as x:
-            logger.error(f'VDM ingestion failed (status code: {resp.status_code}): {x}')
+
+def ingest_into_vdm(stac_path) -> bool:
+    if not os.path.isfile(stac_path):
+        logger.error(f'JSON STAC file not found: "{stac_path}"')
+        return False
+
+    vdm_target = _vdm_target()
+    if vdm_target is None:
+        return False
+    return _post_stac(stac_path, *vdm_target)
+
+
+def ingest_stacs_into_vdm(stac_paths: List[Path]) -> List[Path]:
+    """
+    Ingest several STAC files into the VDM
+    The VDM settings are read once and each worker thread reuses its own connection
+    :param stac_paths: Paths of the STAC files to ingest
+    :type stac_paths: List[Path]
+    :return: Paths of the STAC files which were not ingested
+    """
+    if not stac_paths:
+        return []
+    vdm_target = _vdm_target()
+    if vdm_target is None:
+        return list(stac_paths)
+    vdm_endpoint, headers = vdm_target
+
+    def ingest(stac_path) -> bool:
+        if not os.path.isfile(stac_path):
+            logger.error(f'JSON STAC file not found: "{stac_path}"')
             return False
+        return _post_stac(stac_path, vdm_endpoint, headers)
+
+    # The requests are network bound: keep a few of them in flight
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        ingested = list(executor.map(ingest, stac_paths))
+    return [stac_path for stac_path, done in zip(stac_paths, ingested) if not done]
 
 
 if __name__ == "__main__":
@@ -6,10 +6,120 @@
     - https://docs.pytest.org/en/stable/fixture.html
     - https://docs.pytest.org/en/stable/writing_plugins.html
 """
+import cProfile
+import ctypes
+import gc
+import os
+import re
 import pytest
 import json
+from tempfile import gettempdir
+from functools import lru_cache
 import worldcereal.resources.exampleconfigs
 import importlib_resources as pkg_resources
+from ewoc_dag.bucket.ewoc import EWOCARDBucket, EWOCAuxDataBucket
+from ewoc_classif import classif
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-validation", action="store_true", default=False,
+                     help="run the validation tests (same as setting EWOC_TEST_VAL_TEST)")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Tests skipped by default, by marker
+    skips = {}
+    if not config.getoption("--run-validation") and os.getenv("EWOC_TEST_VAL_TEST") is None:
+        skips["validation"] = pytest.mark.skip(
+            reason="validation test: use --run-validation or set EWOC_TEST_VAL_TEST")
+    if os.getenv("EWOC_TEST_KNOWN_MAXGAP") is None:
+        skips["maxgap"] = pytest.mark.skip(
+            reason="known maxgap failure: set EWOC_TEST_KNOWN_MAXGAP")
+    if os.getenv("EWOC_TEST_INTEGRATION") is None:
+        skips["integration"] = pytest.mark.skip(
+            reason="upload to the EWoC buckets: set EWOC_TEST_INTEGRATION")
+    for item in items:
+        if "validation" in item.keywords:
+            # Whole block processing from ARD
+            item.add_marker(pytest.mark.timeout(1800))
+        for marker, skip in skips.items():
+            if marker in item.keywords:
+                item.add_marker(skip)
+
+
+# GDAL cache options for the block reads of the ARD COGs on S3, unless already set.
+# The directory listings are kept: the processing may rely on the sidecar files
+_GDAL_S3_OPTIONS = {
+    "GDAL_CACHEMAX": "512",
+    "VSI_CACHE": "TRUE",
+    "CPL_VSIL_CURL_CACHE_SIZE": "200000000",
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def gdal_s3_env():
+    with pytest.MonkeyPatch.context() as mpatch:
+        for option, value in _GDAL_S3_OPTIONS.items():
+            if option not in os.environ:
+                mpatch.setenv(option, value)
+        yield
+
+
+# glibc only: give the freed heap back to the system
+try:
+    _MALLOC_TRIM = ctypes.CDLL("libc.so.6").malloc_trim
+except (OSError, AttributeError):
+    _MALLOC_TRIM = None
+
+
+@pytest.fixture(autouse=True)
+def release_memory():
+    """Release the memory of the block arrays once each test is done"""
+    yield
+    gc.collect()
+    if _MALLOC_TRIM is not None:
+        _MALLOC_TRIM(0)
+
+
+@pytest.fixture(autouse=True)
+def profile_ewoc(request):
+    """Profile each test when EWOC_TEST_PROFILE is set
+
+    The stats are written to <tmpdir>/profile_<test id>.prof, to be read with pstats or
+    snakeviz.
+    """
+    if os.getenv("EWOC_TEST_PROFILE") is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    yield
+    profiler.disable()
+    prof_name = re.sub(r"[^\w.-]", "_", request.node.nodeid)
+    profiler.dump_stats(os.path.join(gettempdir(), f"profile_{prof_name}.prof"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """Run each test from its own folder
+
+    The classifier writes its tmp files in cwd and the clean step removes them from
+    there, so the xdist workers must not share it.
+    """
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture(scope="session")
+def clean():
+    """Remove the outputs of the tests, unless EWOC_TEST_DEBUG_MODE is set"""
+    return os.getenv("EWOC_TEST_DEBUG_MODE") is None
+
+
+@lru_cache(maxsize=None)
+def _read_example_config(config_file):
+    # Cache the text only: each test parses its own copy, which it may modify
+    with pkg_resources.open_text(worldcereal.resources.exampleconfigs, config_file) as data:
+        return data.read()
 
 
 @pytest.fixture
@@ -18,10 +128,61 @@ def config_ref():
                    "example_bucketrun_summer2_config.json","example_bucketrun_winter_config.json"]
     config_ref_list = {}
     for config_file in config_list:
-        data = pkg_resources.open_text(worldcereal.resources.exampleconfigs, config_file)
-        data_js = json.load(data)
+        data_js = json.loads(_read_example_config(config_file))
         data_js["parameters"]["year"]=str(data_js["parameters"]["year"])
         config_name = config_file.split("_")[2]
         config_ref_list[config_name]= data_js
     return config_ref_list
 
+
+@pytest.fixture(scope="session")
+def ard_csvs(tmp_path_factory):
+    """Build the satio csv files of the ARD of a tile once per test session
+
+    Returns a function taking the tile id and the production id and returning the
+    keyword arguments to pass to generate_ewoc_block.
+    The cache is per xdist worker: the tests building the csv files of the same tile
+    are put in one xdist_group so that they hit it.
+    """
+    csvs_cache = {}
+
+    def _ard_csvs(tile_id, production_id):
+        if (tile_id, production_id) not in csvs_cache:
+            csv_dir = tmp_path_factory.mktemp(f"ard_{tile_id}")
+            ewoc_ard_bucket = EWOCARDBucket()
+            csvs = {
+                "sar_csv": csv_dir / "satio_sar.csv",
+                "optical_csv": csv_dir / "satio_optical.csv",
+                "tir_csv": csv_dir / "satio_tir.csv",
+                "agera5_csv": csv_dir / "satio_agera5.csv",
+            }
+            ewoc_ard_bucket.sar_to_satio_csv(tile_id, production_id,
+                                             filepath=csvs["sar_csv"])
+            ewoc_ard_bucket.optical_to_satio_csv(tile_id, production_id,
+                                                 filepath=csvs["optical_csv"])
+            ewoc_ard_bucket.tir_to_satio_csv(tile_id, production_id,
+                                             filepath=csvs["tir_csv"])
+            EWOCAuxDataBucket().agera5_to_satio_csv(filepath=csvs["agera5_csv"])
+            csvs_cache[(tile_id, production_id)] = csvs
+        return csvs_cache[(tile_id, production_id)]
+
+    return _ard_csvs
+
+
+@pytest.fixture
+def offline_block(monkeypatch):
+    """Run generate_ewoc_block without the buckets, from the existing block features
+
+    Returns a function setting the result of the worldcereal block processing: a
+    return code or an exception to raise.
+    """
+    def _set_run_tile_result(result):
+        def _run_tile(*args, **kwargs):
+            if isinstance(result, Exception):
+                raise result
+            return result
+        monkeypatch.setattr(classif, "run_tile", _run_tile)
+
+    monkeypatch.setattr(classif, "EWOCPRDBucket", lambda: None)
+    monkeypatch.setattr(classif, "download_features", lambda *args, **kwargs: True)
+    return _set_run_tile_result
@@ -1,31 +1,207 @@
-from ewoc_classif.utils import generate_config_file
-from distutils.util import strtobool
+from concurrent.futures import ThreadPoolExecutor
+from ewoc_classif import utils
+from ewoc_classif.utils import (_scan_tree, _str_to_bool, check_outfold, generate_config_file,
+                                remove_tmp_files, update_metajsons, valid_year)
+import argparse
+import json
 import os
+import pytest
 
+# Inputs shared by all the generated configs
+CSV_DICT = {
+    "OPTICAL": "/data/worldcereal/s3collections/satio_optical.csv",
+    "SAR": "/data/worldcereal/s3collections/satio_sar.csv",
+    "TIR": "/data/worldcereal/s3collections/satio_tir.csv",
+    "DEM": "s3://ewoc-aux-data/CopDEM_20m",
+    "METEO": "/data/worldcereal/s3collections/satio_agera5_yearly.csv"
+}
+CROPLAND_MODEL_VERSION = "v605"
+CROPTYPE_MODEL_VERSION = "v502"
+IRR_MODEL_VERSION = "v420"
+CONFIG_KWARGS = {
+    "csv_dict": CSV_DICT,
+    "feature_blocks_dir": "/path/for/feature/blocks",
+    "no_tir_data": False,
+    "use_existing_features": False,
+}
 
-def test_generate_config_file(config_ref):
-    csv_dict = {
-        "OPTICAL": "/data/worldcereal/s3collections/satio_optical.csv",
-        "SAR": "/data/worldcereal/s3collections/satio_sar.csv",
-        "TIR": "/data/worldcereal/s3collections/satio_tir.csv",
-        "DEM": "s3://ewoc-aux-data/CopDEM_20m",
-        "METEO": "/data/worldcereal/s3collections/satio_agera5_yearly.csv"
-    }
+
+@pytest.mark.parametrize("featuresettings,ewoc_season,cropland_model_version", [
+    ("cropland", "annual", CROPLAND_MODEL_VERSION),
+    ("croptype", "summer1", CROPTYPE_MODEL_VERSION),
+    ("croptype", "summer2", CROPTYPE_MODEL_VERSION),
+    ("croptype", "winter", CROPTYPE_MODEL_VERSION),
+])
+def test_generate_config_file(featuresettings, ewoc_season, cropland_model_version, config_ref):
     production_id = "EWoC_admin_12048_20220302203007"
-    is_dev = strtobool(os.getenv("EWOC_DEV_MODE", "False"))
+    is_dev = _str_to_bool(os.getenv("EWOC_DEV_MODE", "False"))
     if is_dev:
         cropland_mask_bucket = f"s3://ewoc-prd-dev/{production_id}"
     else:
         cropland_mask_bucket = f"s3://ewoc-prd/{production_id}"
     # Update to cropland mask bucket in reference config
-    for config in config_ref:
-        if config != "annual":
-            config_ref[config]["parameters"]["cropland_mask"] = cropland_mask_bucket
-    cropland_model_version = "v605"
-    croptype_model_version: str="v502"
-    irr_model_version = "v420"
-    feature_blocks_dir= "/path/for/feature/blocks"
-    assert generate_config_file("cropland", "2019", "annual",production_id, cropland_model_version, croptype_model_version, irr_model_version, csv_dict,feature_blocks_dir=feature_blocks_dir) == config_ref["annual"]
-    assert generate_config_file("croptype", "2019", "summer1",production_id,croptype_model_version, croptype_model_version, irr_model_version, csv_dict,feature_blocks_dir=feature_blocks_dir) == config_ref["summer1"]
-    assert generate_config_file("croptype", "2019", "summer2",production_id, croptype_model_version, croptype_model_version, irr_model_version, csv_dict,feature_blocks_dir=feature_blocks_dir) == config_ref["summer2"]
-    assert generate_config_file("croptype", "2019", "winter",production_id, croptype_model_version, croptype_model_version, irr_model_version, csv_dict,feature_blocks_dir=feature_blocks_dir) == config_ref["winter"]
\ No newline at end of file
+    if ewoc_season != "annual":
+        config_ref[ewoc_season]["parameters"]["cropland_mask"] = cropland_mask_bucket
+    assert generate_config_file(featuresettings, "2019", ewoc_season, production_id,
+                                cropland_model_version, CROPTYPE_MODEL_VERSION,
+                                IRR_MODEL_VERSION, **CONFIG_KWARGS) == config_ref[ewoc_season]
+
+
+def test_valid_year():
+    assert valid_year("2021") == 2021
+
+
+@pytest.mark.parametrize("cli_str", ["21", "abcd", "0000", "20211", "２０２１"])
+def test_valid_year_invalid(cli_str):
+    with pytest.raises(argparse.ArgumentTypeError):
+        valid_year(cli_str)
+
+
+def test_scan_tree(tmp_path):
+    (tmp_path / "keep" / "deep").mkdir(parents=True)
+    (tmp_path / "keep" / "deep" / "a_31TCJ.tif").touch()
+    (tmp_path / "dir_31TCJ.tif").mkdir()
+    (tmp_path / "dir_31TCJ.tif" / "inner_31TCJ.tif").touch()
+    (tmp_path / "other.tif").touch()
+    found = {entry.name for entry in _scan_tree(tmp_path,
+                                                lambda entry: entry.name.endswith("31TCJ.tif"))}
+    # The matching dir is yielded but not walked into
+    assert found == {"a_31TCJ.tif", "dir_31TCJ.tif"}
+
+
+def test_scan_tree_unreadable_folder(tmp_path, monkeypatch):
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "locked" / "a_31TCJ.tif").touch()
+    (tmp_path / "b_31TCJ.tif").touch()
+    scandir = os.scandir
+
+    def denied_scandir(path):
+        if path.endswith("locked"):
+            raise PermissionError(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", denied_scandir)
+    found = [entry.name for entry in _scan_tree(tmp_path,
+                                                lambda entry: entry.name.endswith("31TCJ.tif"))]
+    assert found == ["b_31TCJ.tif"]
+
+
+def test_scan_tree_missing_folder(tmp_path):
+    assert list(_scan_tree(tmp_path / "missing", lambda entry: True)) == []
+
+
+def test_remove_tmp_files(tmp_path):
+    kept = []
+    for idx in range(20):
+        subdir = tmp_path / f"sub{idx}" / "nested"
+        subdir.mkdir(parents=True)
+        # More entries than the deletions in flight, to go through the threaded removal
+        for jdx in range(20):
+            (subdir / f"feat{jdx}_31TCJ.tif").touch()
+        (subdir / f"block{idx}_31TCJ.tif").mkdir()
+        (subdir / f"block{idx}_31TCJ.tif" / "data.bin").touch()
+        kept.append(subdir / "feat_31TCK.tif")
+        kept[-1].touch()
+    remove_tmp_files(tmp_path, "31TCJ.tif")
+    remaining = [path for path in tmp_path.rglob("*") if path.is_file()]
+    assert sorted(remaining) == sorted(kept)
+    assert not list(tmp_path.rglob("*31TCJ.tif"))
+
+
+def test_remove_tmp_files_missing_folder(tmp_path):
+    remove_tmp_files(tmp_path / "missing", "31TCJ.tif")
+
+
+def test_check_outfold(tmp_path):
+    assert not check_outfold(tmp_path)
+    (tmp_path / "block" / "nested").mkdir(parents=True)
+    assert not check_outfold(tmp_path)
+    (tmp_path / "block" / "nested" / "31TCJ.tif").touch()
+    assert check_outfold(tmp_path)
+
+
+def test_check_outfold_not_a_folder(tmp_path):
+    assert not check_outfold(tmp_path / "missing")
+    (tmp_path / "31TCJ.tif").touch()
+    assert not check_outfold(tmp_path / "31TCJ.tif")
+
+
+def test_update_metajsons(tmp_path):
+    block_dir = tmp_path / "cogs" / "31TCJ"
+    block_dir.mkdir(parents=True)
+    meta = block_dir / "metadata_31TCJ.json"
+    meta.write_text(json.dumps({
+        "links": [{"rel": "self", "href": f"{block_dir}/metadata_31TCJ.json"},
+                  {"rel": "parent", "href": f"{tmp_path}/collection.json"}],
+        "assets": {"product": {"href": f"{block_dir}/31TCJ.tif"}},
+        "properties": {"public": "false", "users": ["0000"],
+                       "tile_collection_id": "31TCJ_cropland_0000"},
+    }), encoding="UTF-8")
+    (block_dir / "other.json").write_text("{}", encoding="UTF-8")
+    root_path = "s3://ewoc-prd/c728b264_12048_20220302203007"
+
+    assert update_metajsons(root_path, tmp_path) == [meta]
+    data = json.loads(meta.read_text(encoding="UTF-8"))
+    assert data["links"][0]["href"] == f"{root_path}/cogs/31TCJ/metadata_31TCJ.json"
+    assert data["links"][1]["href"] == f"{tmp_path}/collection.json"
+    assert data["assets"]["product"]["href"] == f"{root_path}/cogs/31TCJ/31TCJ.tif"
+    assert data["properties"]["public"] == "true"
+    assert data["properties"]["users"] == ["c728b264"]
+    assert data["properties"]["tile_collection_id"] == "31TCJ_cropland_c728b264"
+
+
+def test_update_metajsons_missing_folder(tmp_path):
+    assert update_metajsons("s3://ewoc-prd/c728b264_12048_20220302203007",
+                            tmp_path / "missing") == []
+
+
+@pytest.fixture
+def vdm_env(monkeypatch):
+    monkeypatch.setenv("VDM_HOST", "vdm.test")
+    monkeypatch.setenv("VDM_USERINFO", "userinfo")
+
+
+def test_ingest_stacs_into_vdm(tmp_path, vdm_env, monkeypatch):
+    stac_paths = [tmp_path / f"metadata_{idx}.json" for idx in range(6)]
+    for stac_path in stac_paths[:-1]:
+        stac_path.write_text("{}", encoding="UTF-8")
+    posted = []
+
+    def post_stac(stac_path, vdm_endpoint, headers):
+        posted.append(stac_path)
+        assert vdm_endpoint == "http://vdm.test/rest/project/worldCereal/product"
+        assert headers["x-userinfo"] == "userinfo"
+        return stac_path != stac_paths[1]
+
+    monkeypatch.setattr(utils, "_post_stac", post_stac)
+    # The missing file is not posted and counts as failed
+    assert utils.ingest_stacs_into_vdm(stac_paths) == [stac_paths[1], stac_paths[-1]]
+    assert sorted(posted) == sorted(stac_paths[:-1])
+
+
+def test_ingest_stacs_into_vdm_no_host(tmp_path, vdm_env, monkeypatch):
+    monkeypatch.delenv("VDM_HOST")
+    stac_path = tmp_path / "metadata_31TCJ.json"
+    stac_path.write_text("{}", encoding="UTF-8")
+    assert utils.ingest_stacs_into_vdm([stac_path]) == [stac_path]
+    assert utils.ingest_stacs_into_vdm([]) == []
+
+
+def test_ingest_stacs_into_vdm_connection_error(tmp_path, vdm_env, monkeypatch):
+    requests = pytest.importorskip("requests")
+    stac_path = tmp_path / "metadata_31TCJ.json"
+    stac_path.write_text("{}", encoding="UTF-8")
+
+    class RefusingSession:
+        def post(self, *args, **kwargs):
+            raise requests.ConnectionError("Connection refused")
+
+    monkeypatch.setattr(utils, "_vdm_session", RefusingSession)
+    assert utils.ingest_stacs_into_vdm([stac_path]) == [stac_path]
+
+
+def test_vdm_session_per_thread():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other_session = executor.submit(utils._vdm_session).result()
+    assert utils._vdm_session() is utils._vdm_session()
+    assert utils._vdm_session() is not other_session